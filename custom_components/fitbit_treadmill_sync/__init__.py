@@ -2,21 +2,27 @@
 from __future__ import annotations
 
 import logging
+import time
 from typing import Any
 
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import config_entry_oauth2_flow, config_validation as cv
 
-from .api import FitbitAPI
+from .api import FitbitAPI, FitbitAPIError
 from .const import (
+    CONF_ACTIVITY_TYPE,
     CONF_OAUTH_ACCESS_TOKEN,
     CONF_OAUTH_EXPIRES_AT,
     CONF_OAUTH_REFRESH_TOKEN,
+    CONF_REFRESH_BUFFER_SEC,
+    DEFAULT_ACTIVITY_TYPE,
     DOMAIN,
     SERVICE_SYNC_WORKOUT,
+    TOKEN_REFRESH_BUFFER,
 )
 from .coordinator import FitbitTreadmillCoordinator
 
@@ -64,15 +70,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         expires_at=expires_at,
         client_id=client_id,
         client_secret=client_secret,
+        activity_type=entry.data.get(CONF_ACTIVITY_TYPE, DEFAULT_ACTIVITY_TYPE),
     )
 
-    # Validate API connection
-    try:
-        await api.get_user_profile()
-        _LOGGER.info("Successfully connected to Fitbit API")
-    except Exception as err:
-        _LOGGER.error("Failed to connect to Fitbit API: %s", err)
-        return False
+    # Validate API connection, unless the stored token is still valid
+    refresh_buffer = entry.options.get(CONF_REFRESH_BUFFER_SEC, TOKEN_REFRESH_BUFFER)
+    if expires_at and expires_at > time.time() + refresh_buffer:
+        _LOGGER.debug("Access token still valid, skipping profile probe")
+    else:
+        try:
+            await api.get_user_profile()
+            _LOGGER.info("Successfully connected to Fitbit API")
+        except FitbitAPIError as err:
+            # Let Home Assistant retry setup with backoff
+            raise ConfigEntryNotReady(f"Failed to connect to Fitbit API: {err}") from err
 
     # Create coordinator
     coordinator = FitbitTreadmillCoordinator(
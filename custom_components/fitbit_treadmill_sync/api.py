@@ -1,27 +1,42 @@
 """Fitbit API client for Treadmill Sync integration."""
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
 import logging
+import random
 import time
 from typing import Any
+from urllib.parse import urlencode
 
-import fitbit
+import aiohttp
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
     ACTIVITY_TYPES,
     CONF_OAUTH_ACCESS_TOKEN,
     CONF_OAUTH_EXPIRES_AT,
     CONF_OAUTH_REFRESH_TOKEN,
+    CONF_REFRESH_BUFFER_SEC,
+    CONF_STRIDE_LENGTH,
+    DEFAULT_STRIDE_LENGTH,
     FEET_PER_MILE,
+    FITBIT_API_BASE,
+    FITBIT_RATE_LIMIT,
+    FITBIT_REQUEST_TIMEOUT,
+    OAUTH2_TOKEN,
     TOKEN_REFRESH_BUFFER,
+    TOKEN_REFRESH_JITTER,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+ACTIVITIES_URL = f"{FITBIT_API_BASE}/1/user/-/activities.json"
+PROFILE_URL = f"{FITBIT_API_BASE}/1/user/-/profile.json"
+
 
 class FitbitAPIError(Exception):
     """Base exception for Fitbit API errors."""
@@ -34,6 +49,28 @@ class RateLimitError(FitbitAPIError):
 class FitbitAPI:
     """Wrapper for Fitbit API interactions."""
 
+    __slots__ = (
+        "hass",
+        "entry",
+        "access_token",
+        "refresh_token",
+        "expires_at",
+        "client_id",
+        "client_secret",
+        "_session",
+        "_timeout",
+        "_activity_type",
+        "_activity_id",
+        "_activity_body_prefix",
+        "_steps_per_mile",
+        "_refresh_buffer",
+        "_refresh_jitter",
+        "_refresh_lock",
+        "_prev_bucket_count",
+        "_curr_bucket_count",
+        "_bucket_start",
+    )
+
     def __init__(
         self,
         hass: HomeAssistant,
@@ -43,6 +80,7 @@ class FitbitAPI:
         expires_at: float,
         client_id: str,
         client_secret: str,
+        activity_type: str,
     ) -> None:
         """Initialize Fitbit API client."""
         self.hass = hass
@@ -53,87 +91,177 @@ class FitbitAPI:
         self.client_id = client_id
         self.client_secret = client_secret
 
-        # Initialize Fitbit client
-        self.client = fitbit.Fitbit(
-            client_id=client_id,
-            client_secret=client_secret,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            system="en_US",
+        # Shared Home Assistant HTTP session
+        self._session = async_get_clientsession(hass)
+        self._timeout = aiohttp.ClientTimeout(total=FITBIT_REQUEST_TIMEOUT)
+
+        # Resolve the configured activity once; unknown types fall back to Walking
+        self._activity_type = activity_type
+        self._activity_id = ACTIVITY_TYPES.get(activity_type, ACTIVITY_TYPES["Walking"])
+        self._activity_body_prefix = (
+            f"activityId={self._activity_id}&distanceUnit=mi&".encode()
+        )
+
+        # Stride length only changes through the options flow, which reloads
+        # the entry, so the conversion factor can be fixed here
+        stride_feet = entry.data.get(CONF_STRIDE_LENGTH, DEFAULT_STRIDE_LENGTH)
+        self._steps_per_mile = FEET_PER_MILE / stride_feet
+
+        # Token refresh timing; jitter spreads refreshes across instances
+        self._refresh_buffer = entry.options.get(
+            CONF_REFRESH_BUFFER_SEC, TOKEN_REFRESH_BUFFER
         )
+        self._refresh_jitter = random.uniform(0, TOKEN_REFRESH_JITTER)
+        self._refresh_lock = asyncio.Lock()
 
-        # Rate limiting
-        self._request_times: list[float] = []
+        # Rate limiting (sliding window counter over two hourly buckets).
+        # Intervals use the monotonic clock so wall-clock jumps can't skew
+        # the window; token expiry stays on time.time() because expires_at
+        # is a Unix timestamp.
+        self._prev_bucket_count = 0
+        self._curr_bucket_count = 0
+        self._bucket_start = time.monotonic()
 
     async def _ensure_token_valid(self) -> None:
-        """Ensure OAuth token is valid, refresh if needed."""
-        current_time = time.time()
+        """Ensure OAuth token is valid, refresh if needed.
 
-        # Check if token needs refresh (5 min buffer)
-        if current_time >= self.expires_at - TOKEN_REFRESH_BUFFER:
-            _LOGGER.debug("Access token expired or expiring soon, refreshing")
-            await self._refresh_token()
+        The check is repeated under the lock so concurrent callers wait for a
+        single refresh instead of each rotating the refresh token.
+        """
+        async with self._refresh_lock:
+            # Wall clock, since expires_at is a Unix timestamp
+            current_time = time.time()
+            threshold = self.expires_at - self._refresh_buffer - self._refresh_jitter
+
+            # Check if token needs refresh
+            if current_time >= threshold:
+                _LOGGER.debug("Access token expired or expiring soon, refreshing")
+                await self._refresh_token()
 
     async def _refresh_token(self) -> None:
-        """Refresh OAuth token."""
+        """Refresh OAuth token.
+
+        Raises:
+            ConfigEntryAuthFailed: If Fitbit rejects the refresh token
+            RateLimitError: If rate limit is exceeded
+            FitbitAPIError: For network errors and server-side failures
+        """
         try:
-            # Refresh token using fitbit library
-            token_data = await self.hass.async_add_executor_job(
-                self.client.client.refresh_token
-            )
+            async with self._session.post(
+                OAUTH2_TOKEN,
+                data={
+                    "grant_type": "refresh_token",
+                    "refresh_token": self.refresh_token,
+                },
+                auth=aiohttp.BasicAuth(self.client_id, self.client_secret),
+                timeout=self._timeout,
+            ) as resp:
+                # invalid_grant / invalid_token: the user must reauthorize
+                if resp.status in (400, 401):
+                    _LOGGER.error(
+                        "Fitbit rejected token refresh: %s", await resp.text()
+                    )
+                    raise ConfigEntryAuthFailed("Token refresh failed")
+                if resp.status == 429:
+                    raise RateLimitError("Rate limit exceeded during token refresh")
+                if resp.status >= 400:
+                    raise FitbitAPIError(f"Token refresh failed: HTTP {resp.status}")
+                token_data = await resp.json()
+                access_token = token_data["access_token"]
+                refresh_token = token_data["refresh_token"]
+                expires_in = token_data["expires_in"]
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            _LOGGER.error("Failed to refresh token: %s", err)
+            raise FitbitAPIError(f"Token refresh failed: {err}") from err
 
-            # Update stored tokens
-            self.access_token = token_data["access_token"]
-            self.refresh_token = token_data["refresh_token"]
-            self.expires_at = time.time() + token_data["expires_in"]
-
-            # Update config entry
-            new_data = {**self.entry.data}
-            new_data["token"] = {
-                CONF_OAUTH_ACCESS_TOKEN: self.access_token,
-                CONF_OAUTH_REFRESH_TOKEN: self.refresh_token,
-                CONF_OAUTH_EXPIRES_AT: self.expires_at,
-            }
-
-            self.hass.config_entries.async_update_entry(
-                self.entry,
-                data=new_data,
-            )
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.error("Unexpected token refresh response: %s", err)
+            raise FitbitAPIError(f"Invalid token response: {err}") from err
+
+        # Update stored tokens
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = time.time() + expires_in
+        self._refresh_jitter = random.uniform(0, TOKEN_REFRESH_JITTER)
+
+        # Update config entry right away: Fitbit rotates refresh tokens, so
+        # the previously stored one is no longer valid
+        token = {
+            CONF_OAUTH_ACCESS_TOKEN: self.access_token,
+            CONF_OAUTH_REFRESH_TOKEN: self.refresh_token,
+            CONF_OAUTH_EXPIRES_AT: self.expires_at,
+        }
+        self.hass.config_entries.async_update_entry(
+            self.entry,
+            data={**self.entry.data, "token": token},
+        )
 
-            _LOGGER.info("Successfully refreshed Fitbit OAuth token")
+        _LOGGER.info("Successfully refreshed Fitbit OAuth token")
 
-        except Exception as err:
-            _LOGGER.error("Failed to refresh token: %s", err)
-            raise ConfigEntryAuthFailed("Token refresh failed") from err
+    async def _request(
+        self, method: str, url: str, body: bytes | None = None
+    ) -> dict[str, Any]:
+        """Make an authenticated request and map HTTP errors to exceptions.
+
+        A body, if given, must already be form-urlencoded.
+        """
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        if body is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        async with self._session.request(
+            method,
+            url,
+            data=body,
+            headers=headers,
+            timeout=self._timeout,
+        ) as resp:
+            if resp.status == 401:
+                raise ConfigEntryAuthFailed("Authentication failed")
+            if resp.status == 429:
+                raise RateLimitError("Rate limit exceeded")
+            if resp.status == 400:
+                raise FitbitAPIError(f"Bad request: {await resp.text()}")
+            if resp.status >= 400:
+                raise FitbitAPIError(f"HTTP {resp.status}: {await resp.text()}")
+            try:
+                return await resp.json()
+            except ValueError as err:
+                raise FitbitAPIError(f"Invalid response: {err}") from err
 
     async def _check_rate_limit(self) -> None:
-        """Check if we're within rate limits."""
-        current_time = time.time()
+        """Check if we're within rate limits.
 
-        # Remove requests older than 1 hour
-        self._request_times = [
-            t for t in self._request_times if current_time - t < 3600
-        ]
+        Approximates a sliding one hour window by weighting the previous
+        bucket's count by how much of it still overlaps the window.
+        """
+        current_time = time.monotonic()
+        elapsed = current_time - self._bucket_start
+
+        # Roll buckets once the current one is older than an hour
+        if elapsed >= 3600:
+            self._prev_bucket_count = (
+                self._curr_bucket_count if elapsed < 7200 else 0
+            )
+            self._curr_bucket_count = 0
+            self._bucket_start += 3600 * int(elapsed // 3600)
+            elapsed = current_time - self._bucket_start
 
         # Check if we would exceed rate limit
-        if len(self._request_times) >= 150:  # Fitbit: 150 req/hour
+        weight = 1 - elapsed / 3600
+        estimated = self._curr_bucket_count + self._prev_bucket_count * weight
+        if estimated >= FITBIT_RATE_LIMIT:
             raise RateLimitError("Fitbit API rate limit would be exceeded")
 
-        # Add current request time
-        self._request_times.append(current_time)
+        # Count current request
+        self._curr_bucket_count += 1
 
-    async def convert_distance_to_steps(
-        self,
-        distance_miles: float,
-        stride_feet: float,
-        activity_type: str,
-    ) -> tuple[int, str]:
+    def convert_distance_to_steps(self, distance_miles: float) -> tuple[int, str]:
         """Convert distance to steps with fallback.
 
         Args:
             distance_miles: Distance in miles
-            stride_feet: User's stride length in feet (for fallback)
-            activity_type: Type of activity (Walking, Running, Treadmill)
 
         Returns:
             tuple of (steps, conversion_method)
@@ -145,15 +273,8 @@ class FitbitAPI:
         # For now, we'll use manual calculation as the primary method since
         # the API behavior is not explicitly documented.
 
-        _LOGGER.debug(
-            "Using manual step conversion: %.2f miles, %.2f ft stride",
-            distance_miles,
-            stride_feet,
-        )
-
-        # Method 2: Manual calculation
-        distance_feet = distance_miles * FEET_PER_MILE
-        steps = int(distance_feet / stride_feet)
+        # Method 2: Manual calculation using the configured stride length
+        steps = int(distance_miles * self._steps_per_mile)
 
         _LOGGER.info(
             "Converted %.2f miles to %d steps using manual calculation",
@@ -165,7 +286,6 @@ class FitbitAPI:
 
     async def create_activity_log(
         self,
-        activity_type: str,
         distance_miles: float,
         start_time: datetime,
         duration_minutes: int,
@@ -174,7 +294,6 @@ class FitbitAPI:
         """Create activity log in Fitbit.
 
         Args:
-            activity_type: Type of activity (Walking, Running, Treadmill)
             distance_miles: Distance in miles
             start_time: When the workout started
             duration_minutes: Duration in minutes
@@ -194,17 +313,12 @@ class FitbitAPI:
         # Check rate limit
         await self._check_rate_limit()
 
-        # Get activity ID from type
-        activity_id = ACTIVITY_TYPES.get(activity_type, ACTIVITY_TYPES["Walking"])
-
-        # Prepare activity data
+        # Prepare activity data; the constant fields are pre-encoded
         activity_data = {
-            "activityId": activity_id,
-            "startTime": start_time.strftime("%H:%M"),
-            "durationMillis": duration_minutes * 60 * 1000,
-            "date": start_time.strftime("%Y-%m-%d"),
+            "startTime": f"{start_time.hour:02d}:{start_time.minute:02d}",
+            "durationMillis": duration_minutes * 60_000,
+            "date": start_time.date().isoformat(),
             "distance": distance_miles,
-            "distanceUnit": "mi",
         }
 
         # Include steps if provided
@@ -213,36 +327,36 @@ class FitbitAPI:
         if steps is not None:
             activity_data["steps"] = steps
 
+        body = self._activity_body_prefix + urlencode(activity_data).encode()
+
         _LOGGER.debug("Creating Fitbit activity log: %s", activity_data)
 
         try:
             # Make API call
-            response = await self.hass.async_add_executor_job(
-                self.client.activities, data=activity_data
-            )
+            response = await self._request("POST", ACTIVITIES_URL, body=body)
 
             _LOGGER.info(
                 "Successfully created Fitbit activity: %s, %.2f miles, %s steps",
-                activity_type,
+                self._activity_type,
                 distance_miles,
                 steps if steps else "auto-calculated",
             )
 
             return response
 
-        except fitbit.exceptions.HTTPUnauthorized as err:
+        except ConfigEntryAuthFailed as err:
             _LOGGER.error("Fitbit authentication failed: %s", err)
-            raise ConfigEntryAuthFailed("Authentication failed") from err
+            raise
 
-        except fitbit.exceptions.HTTPTooManyRequests as err:
+        except RateLimitError as err:
             _LOGGER.warning("Fitbit rate limit exceeded: %s", err)
-            raise RateLimitError("Rate limit exceeded") from err
+            raise
 
-        except fitbit.exceptions.HTTPBadRequest as err:
-            _LOGGER.error("Bad request to Fitbit API: %s", err)
-            raise FitbitAPIError(f"Bad request: {err}") from err
+        except FitbitAPIError as err:
+            _LOGGER.error("Fitbit API request failed: %s", err)
+            raise
 
-        except Exception as err:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
             _LOGGER.error("Failed to create Fitbit activity: %s", err)
             raise FitbitAPIError(f"API error: {err}") from err
 
@@ -251,9 +365,8 @@ class FitbitAPI:
         await self._ensure_token_valid()
 
         try:
-            profile = await self.hass.async_add_executor_job(self.client.user_profile_get)
-            return profile
+            return await self._request("GET", PROFILE_URL)
 
-        except Exception as err:
+        except (FitbitAPIError, aiohttp.ClientError, asyncio.TimeoutError) as err:
             _LOGGER.error("Failed to get user profile: %s", err)
             raise FitbitAPIError(f"Failed to get profile: {err}") from err
@@ -6,16 +6,17 @@ from typing import Any
 
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import config_entry_oauth2_flow, selector
 
 from .const import (
-    ACTIVITY_TYPES,
+    ACTIVITY_TYPE_CHOICES,
     CONF_ACTIVITY_TYPE,
     CONF_AUTO_SYNC,
     CONF_DISTANCE_ENTITY,
     CONF_NOTIFICATION_ENABLED,
+    CONF_REFRESH_BUFFER_SEC,
     CONF_STATUS_ENTITY,
     CONF_STRIDE_LENGTH,
     CONF_USER_HEIGHT,
@@ -26,13 +27,105 @@ from .const import (
     DOMAIN,
     INCHES_TO_FEET,
     MAX_HEIGHT,
+    MAX_REFRESH_BUFFER,
     MAX_STRIDE,
     MIN_HEIGHT,
+    MIN_REFRESH_BUFFER,
     MIN_STRIDE,
+    TOKEN_REFRESH_BUFFER,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Form schemas are built once at import; per-entry values for the options
+# form are applied as suggested values when it is shown
+_SENSOR_SELECTOR = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="sensor")
+)
+_ACTIVITY_TYPE_SELECTOR = selector.SelectSelector(
+    selector.SelectSelectorConfig(
+        options=list(ACTIVITY_TYPE_CHOICES),
+        mode=selector.SelectSelectorMode.DROPDOWN,
+    )
+)
+_STRIDE_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(
+        min=MIN_STRIDE,
+        max=MAX_STRIDE,
+        step=0.1,
+        unit_of_measurement="ft",
+        mode=selector.NumberSelectorMode.BOX,
+    )
+)
+_HEIGHT_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(
+        min=MIN_HEIGHT,
+        max=MAX_HEIGHT,
+        step=1,
+        unit_of_measurement="in",
+        mode=selector.NumberSelectorMode.BOX,
+    )
+)
+_REFRESH_BUFFER_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(
+        min=MIN_REFRESH_BUFFER,
+        max=MAX_REFRESH_BUFFER,
+        step=1,
+        unit_of_measurement="s",
+        mode=selector.NumberSelectorMode.BOX,
+    )
+)
+
+_ENTITIES_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_STATUS_ENTITY): _SENSOR_SELECTOR,
+        vol.Required(CONF_DISTANCE_ENTITY): _SENSOR_SELECTOR,
+    }
+)
+
+_CONVERSION_SCHEMA = vol.Schema(
+    {
+        vol.Required(
+            CONF_ACTIVITY_TYPE, default=DEFAULT_ACTIVITY_TYPE
+        ): _ACTIVITY_TYPE_SELECTOR,
+        vol.Optional(CONF_STRIDE_LENGTH): _STRIDE_SELECTOR,
+        vol.Optional(CONF_USER_HEIGHT): _HEIGHT_SELECTOR,
+        vol.Optional(
+            CONF_AUTO_SYNC, default=DEFAULT_AUTO_SYNC
+        ): selector.BooleanSelector(),
+        vol.Optional(
+            CONF_NOTIFICATION_ENABLED, default=DEFAULT_NOTIFICATION_ENABLED
+        ): selector.BooleanSelector(),
+    }
+)
+
+_OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_STATUS_ENTITY): _SENSOR_SELECTOR,
+        vol.Required(CONF_DISTANCE_ENTITY): _SENSOR_SELECTOR,
+        vol.Required(CONF_ACTIVITY_TYPE): _ACTIVITY_TYPE_SELECTOR,
+        vol.Optional(CONF_STRIDE_LENGTH): _STRIDE_SELECTOR,
+        vol.Optional(CONF_USER_HEIGHT): _HEIGHT_SELECTOR,
+        vol.Required(CONF_AUTO_SYNC): selector.BooleanSelector(),
+        vol.Required(CONF_NOTIFICATION_ENABLED): selector.BooleanSelector(),
+        vol.Optional(
+            CONF_REFRESH_BUFFER_SEC, default=TOKEN_REFRESH_BUFFER
+        ): _REFRESH_BUFFER_SELECTOR,
+    }
+)
+
+
+def _validate_entities(
+    hass: HomeAssistant, status_entity: str | None, distance_entity: str | None
+) -> dict[str, str]:
+    """Return form errors for selected entities that don't exist."""
+    errors: dict[str, str] = {}
+    if not hass.states.get(status_entity):
+        errors[CONF_STATUS_ENTITY] = "entity_not_found"
+    if not hass.states.get(distance_entity):
+        errors[CONF_DISTANCE_ENTITY] = "entity_not_found"
+    return errors
+
 
 class FitbitOAuth2FlowHandler(
     config_entry_oauth2_flow.AbstractOAuth2FlowHandler, domain=DOMAIN
@@ -73,13 +166,11 @@ class FitbitOAuth2FlowHandler(
 
         if user_input is not None:
             # Validate that entities exist
-            status_entity = user_input.get(CONF_STATUS_ENTITY)
-            distance_entity = user_input.get(CONF_DISTANCE_ENTITY)
-
-            if not self.hass.states.get(status_entity):
-                errors[CONF_STATUS_ENTITY] = "entity_not_found"
-            if not self.hass.states.get(distance_entity):
-                errors[CONF_DISTANCE_ENTITY] = "entity_not_found"
+            errors = _validate_entities(
+                self.hass,
+                user_input.get(CONF_STATUS_ENTITY),
+                user_input.get(CONF_DISTANCE_ENTITY),
+            )
 
             if not errors:
                 # Store entity config and proceed to conversion settings
@@ -87,20 +178,9 @@ class FitbitOAuth2FlowHandler(
                 return await self.async_step_conversion()
 
         # Show entity selection form
-        data_schema = vol.Schema(
-            {
-                vol.Required(CONF_STATUS_ENTITY): selector.EntitySelector(
-                    selector.EntitySelectorConfig(domain="sensor")
-                ),
-                vol.Required(CONF_DISTANCE_ENTITY): selector.EntitySelector(
-                    selector.EntitySelectorConfig(domain="sensor")
-                ),
-            }
-        )
-
         return self.async_show_form(
             step_id="entities",
-            data_schema=data_schema,
+            data_schema=_ENTITIES_SCHEMA,
             errors=errors,
             description_placeholders={
                 "status_entity_desc": "Entity that changes to 'Post-Workout' when workout completes",
@@ -148,46 +228,9 @@ class FitbitOAuth2FlowHandler(
                 return await self.async_step_pick_implementation()
 
         # Show conversion settings form
-        data_schema = vol.Schema(
-            {
-                vol.Required(
-                    CONF_ACTIVITY_TYPE, default=DEFAULT_ACTIVITY_TYPE
-                ): selector.SelectSelector(
-                    selector.SelectSelectorConfig(
-                        options=list(ACTIVITY_TYPES.keys()),
-                        mode=selector.SelectSelectorMode.DROPDOWN,
-                    )
-                ),
-                vol.Optional(CONF_STRIDE_LENGTH): selector.NumberSelector(
-                    selector.NumberSelectorConfig(
-                        min=MIN_STRIDE,
-                        max=MAX_STRIDE,
-                        step=0.1,
-                        unit_of_measurement="ft",
-                        mode=selector.NumberSelectorMode.BOX,
-                    )
-                ),
-                vol.Optional(CONF_USER_HEIGHT): selector.NumberSelector(
-                    selector.NumberSelectorConfig(
-                        min=MIN_HEIGHT,
-                        max=MAX_HEIGHT,
-                        step=1,
-                        unit_of_measurement="in",
-                        mode=selector.NumberSelectorMode.BOX,
-                    )
-                ),
-                vol.Optional(
-                    CONF_AUTO_SYNC, default=DEFAULT_AUTO_SYNC
-                ): selector.BooleanSelector(),
-                vol.Optional(
-                    CONF_NOTIFICATION_ENABLED, default=DEFAULT_NOTIFICATION_ENABLED
-                ): selector.BooleanSelector(),
-            }
-        )
-
         return self.async_show_form(
             step_id="conversion",
-            data_schema=data_schema,
+            data_schema=_CONVERSION_SCHEMA,
             errors=errors,
             description_placeholders={
                 "stride_desc": "Your stride length in feet (optional if height provided)",
@@ -257,11 +300,7 @@ class FitbitOptionsFlowHandler(config_entries.OptionsFlow):
             # Validate entities
             status_entity = user_input.get(CONF_STATUS_ENTITY)
             distance_entity = user_input.get(CONF_DISTANCE_ENTITY)
-
-            if not self.hass.states.get(status_entity):
-                errors[CONF_STATUS_ENTITY] = "entity_not_found"
-            if not self.hass.states.get(distance_entity):
-                errors[CONF_DISTANCE_ENTITY] = "entity_not_found"
+            errors = _validate_entities(self.hass, status_entity, distance_entity)
 
             # Validate stride/height
             stride_length = user_input.get(CONF_STRIDE_LENGTH)
@@ -282,15 +321,20 @@ class FitbitOptionsFlowHandler(config_entries.OptionsFlow):
                     stride_length = (user_height * DEFAULT_STRIDE_MULTIPLIER) / INCHES_TO_FEET
 
                 # Update config entry
-                new_data = {**self.config_entry.data}
-                new_data[CONF_ACTIVITY_TYPE] = user_input[CONF_ACTIVITY_TYPE]
-                new_data[CONF_STRIDE_LENGTH] = stride_length
-                new_data[CONF_AUTO_SYNC] = user_input[CONF_AUTO_SYNC]
-                new_data[CONF_NOTIFICATION_ENABLED] = user_input[CONF_NOTIFICATION_ENABLED]
+                new_data = {
+                    **self.config_entry.data,
+                    CONF_ACTIVITY_TYPE: user_input[CONF_ACTIVITY_TYPE],
+                    CONF_STRIDE_LENGTH: stride_length,
+                    CONF_AUTO_SYNC: user_input[CONF_AUTO_SYNC],
+                    CONF_NOTIFICATION_ENABLED: user_input[CONF_NOTIFICATION_ENABLED],
+                }
 
                 new_options = {
                     CONF_STATUS_ENTITY: status_entity,
                     CONF_DISTANCE_ENTITY: distance_entity,
+                    CONF_REFRESH_BUFFER_SEC: int(
+                        user_input.get(CONF_REFRESH_BUFFER_SEC, TOKEN_REFRESH_BUFFER)
+                    ),
                 }
 
                 self.hass.config_entries.async_update_entry(
@@ -302,76 +346,32 @@ class FitbitOptionsFlowHandler(config_entries.OptionsFlow):
                 # Trigger reload
                 await self.hass.config_entries.async_reload(self.config_entry.entry_id)
 
-                return self.async_create_entry(title="", data={})
-
-        # Get current values
-        current_stride = self.config_entry.data.get(CONF_STRIDE_LENGTH)
-        current_height = self.config_entry.data.get(CONF_USER_HEIGHT)
-
-        data_schema = vol.Schema(
-            {
-                vol.Required(
-                    CONF_STATUS_ENTITY,
-                    default=self.config_entry.options.get(CONF_STATUS_ENTITY),
-                ): selector.EntitySelector(
-                    selector.EntitySelectorConfig(domain="sensor")
-                ),
-                vol.Required(
-                    CONF_DISTANCE_ENTITY,
-                    default=self.config_entry.options.get(CONF_DISTANCE_ENTITY),
-                ): selector.EntitySelector(
-                    selector.EntitySelectorConfig(domain="sensor")
-                ),
-                vol.Required(
-                    CONF_ACTIVITY_TYPE,
-                    default=self.config_entry.data.get(
-                        CONF_ACTIVITY_TYPE, DEFAULT_ACTIVITY_TYPE
-                    ),
-                ): selector.SelectSelector(
-                    selector.SelectSelectorConfig(
-                        options=list(ACTIVITY_TYPES.keys()),
-                        mode=selector.SelectSelectorMode.DROPDOWN,
-                    )
-                ),
-                vol.Optional(
-                    CONF_STRIDE_LENGTH,
-                    default=current_stride,
-                ): selector.NumberSelector(
-                    selector.NumberSelectorConfig(
-                        min=MIN_STRIDE,
-                        max=MAX_STRIDE,
-                        step=0.1,
-                        unit_of_measurement="ft",
-                        mode=selector.NumberSelectorMode.BOX,
-                    )
-                ),
-                vol.Optional(
-                    CONF_USER_HEIGHT,
-                    default=current_height,
-                ): selector.NumberSelector(
-                    selector.NumberSelectorConfig(
-                        min=MIN_HEIGHT,
-                        max=MAX_HEIGHT,
-                        step=1,
-                        unit_of_measurement="in",
-                        mode=selector.NumberSelectorMode.BOX,
-                    )
-                ),
-                vol.Required(
-                    CONF_AUTO_SYNC,
-                    default=self.config_entry.data.get(CONF_AUTO_SYNC, DEFAULT_AUTO_SYNC),
-                ): selector.BooleanSelector(),
-                vol.Required(
-                    CONF_NOTIFICATION_ENABLED,
-                    default=self.config_entry.data.get(
-                        CONF_NOTIFICATION_ENABLED, DEFAULT_NOTIFICATION_ENABLED
-                    ),
-                ): selector.BooleanSelector(),
-            }
-        )
+                # The flow result becomes entry.options, so return them here
+                # too or they are replaced with an empty dict
+                return self.async_create_entry(title="", data=new_options)
+
+        # Prefill the form with the current configuration
+        data = self.config_entry.data
+        options = self.config_entry.options
+        suggested_values = {
+            CONF_STATUS_ENTITY: options.get(CONF_STATUS_ENTITY),
+            CONF_DISTANCE_ENTITY: options.get(CONF_DISTANCE_ENTITY),
+            CONF_ACTIVITY_TYPE: data.get(CONF_ACTIVITY_TYPE, DEFAULT_ACTIVITY_TYPE),
+            CONF_STRIDE_LENGTH: data.get(CONF_STRIDE_LENGTH),
+            CONF_USER_HEIGHT: data.get(CONF_USER_HEIGHT),
+            CONF_AUTO_SYNC: data.get(CONF_AUTO_SYNC, DEFAULT_AUTO_SYNC),
+            CONF_NOTIFICATION_ENABLED: data.get(
+                CONF_NOTIFICATION_ENABLED, DEFAULT_NOTIFICATION_ENABLED
+            ),
+            CONF_REFRESH_BUFFER_SEC: options.get(
+                CONF_REFRESH_BUFFER_SEC, TOKEN_REFRESH_BUFFER
+            ),
+        }
 
         return self.async_show_form(
             step_id="init",
-            data_schema=data_schema,
+            data_schema=self.add_suggested_values_to_schema(
+                _OPTIONS_SCHEMA, suggested_values
+            ),
             errors=errors,
         )
@@ -1,4 +1,5 @@
 """Constants for the Fitbit Treadmill Sync integration."""
+from types import MappingProxyType
 from typing import Final
 
 DOMAIN: Final = "fitbit_treadmill_sync"
@@ -21,24 +22,31 @@ CONF_STRIDE_LENGTH: Final = "stride_length"
 CONF_USER_HEIGHT: Final = "user_height"
 CONF_AUTO_SYNC: Final = "auto_sync"
 CONF_NOTIFICATION_ENABLED: Final = "notification_enabled"
+CONF_REFRESH_BUFFER_SEC: Final = "refresh_buffer_sec"
 
 # Default Values
 DEFAULT_ACTIVITY_TYPE: Final = "Walking"
 DEFAULT_AUTO_SYNC: Final = True
 DEFAULT_NOTIFICATION_ENABLED: Final = True
+DEFAULT_STRIDE_LENGTH: Final = 2.5  # feet
 DEFAULT_STRIDE_MULTIPLIER: Final = 0.413  # For calculating stride from height
 
 # Activity Types and Fitbit IDs
-ACTIVITY_TYPES: Final = {
-    "Walking": 90013,
-    "Running": 90009,
-    "Treadmill": 15000,
-}
+ACTIVITY_TYPES: Final = MappingProxyType(
+    {
+        "Walking": 90013,
+        "Running": 90009,
+        "Treadmill": 15000,
+    }
+)
+ACTIVITY_TYPE_CHOICES: Final[tuple[str, ...]] = tuple(ACTIVITY_TYPES)
 
 # Fitbit API Configuration
 FITBIT_API_BASE: Final = "https://api.fitbit.com"
 FITBIT_RATE_LIMIT: Final = 150  # Requests per hour
+FITBIT_REQUEST_TIMEOUT: Final = 30  # seconds
 TOKEN_REFRESH_BUFFER: Final = 300  # Refresh token 5 minutes before expiry
+TOKEN_REFRESH_JITTER: Final = 30  # Max random seconds added to the buffer
 
 # State Values
 STATE_POST_WORKOUT: Final = "Post-Workout"
@@ -62,6 +70,14 @@ MIN_STRIDE: Final = 0.5  # feet
 MAX_STRIDE: Final = 5.0  # feet
 MIN_HEIGHT: Final = 36  # inches (3 feet)
 MAX_HEIGHT: Final = 96  # inches (8 feet)
+MIN_REFRESH_BUFFER: Final = 60  # seconds
+MAX_REFRESH_BUFFER: Final = 3600  # seconds
 
 # Sync History
 MAX_HISTORY_SIZE: Final = 50
+
+# Seconds the status must stay Post-Workout before a workout is synced
+SYNC_DEBOUNCE_SECONDS: Final = 3
+
+# Workouts completed within this many seconds of each other are synced as one
+SYNC_BATCH_WINDOW: Final = 30
@@ -1,15 +1,22 @@
 """Coordinator for Fitbit Treadmill Sync integration."""
 from __future__ import annotations
 
+import asyncio
+from collections import deque
+from collections.abc import Mapping
+import contextlib
+from dataclasses import dataclass
 from datetime import datetime
 import logging
+from types import MappingProxyType
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
-from homeassistant.helpers.event import EventStateChangedData, async_track_state_change_event
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util import dt as dt_util
 
 from .api import FitbitAPI, FitbitAPIError, RateLimitError
 from .const import (
@@ -18,17 +25,47 @@ from .const import (
     CONF_DISTANCE_ENTITY,
     CONF_NOTIFICATION_ENABLED,
     CONF_STATUS_ENTITY,
-    CONF_STRIDE_LENGTH,
+    DEFAULT_ACTIVITY_TYPE,
+    DEFAULT_AUTO_SYNC,
+    DEFAULT_NOTIFICATION_ENABLED,
+    DOMAIN,
     EVENT_WORKOUT_SYNCED,
     MAX_DISTANCE,
     MAX_HISTORY_SIZE,
     MIN_DISTANCE,
     STATE_POST_WORKOUT,
     STATE_WORKING,
+    SYNC_BATCH_WINDOW,
+    SYNC_DEBOUNCE_SECONDS,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Only transitions into these states start or complete a session
+_TRACKED_STATES = frozenset({STATE_WORKING, STATE_POST_WORKOUT})
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+_NOTIFICATION_TITLE = "Fitbit Treadmill Sync"
+_SUCCESS_MESSAGE = (
+    "Treadmill workout synced to Fitbit!\n\nDistance: {:.2f} miles\nSteps: {:,}"
+).format
+_ERROR_MESSAGE = "Failed to sync workout to Fitbit:\n{}".format
+
+
+@dataclass(slots=True, frozen=True)
+class SyncRecord:
+    """A workout synced to Fitbit."""
+
+    timestamp: datetime
+    distance_miles: float
+    steps: int
+    duration_minutes: int
+    conversion_method: str
+    activity_type: str
+    success: bool
+    fitbit_log_id: int | None
+
 
 class FitbitTreadmillCoordinator:
     """Coordinate treadmill state monitoring and Fitbit sync."""
@@ -46,13 +83,38 @@ class FitbitTreadmillCoordinator:
 
         # State tracking
         self._current_session: dict[str, Any] | None = None
-        self._sync_history: list[dict[str, Any]] = []
+        self._sync_history: deque[SyncRecord] = deque(maxlen=MAX_HISTORY_SIZE)
         self._last_sync_time: datetime | None = None
         self._unsub_listeners: list = []
+        self._debounce_handle: asyncio.TimerHandle | None = None
+        self._debounce_end_time: datetime | None = None
+        self._complete_task: asyncio.Task | None = None
+
+        # Completed workouts waiting to be synced as (start, miles, minutes)
+        self._pending_queue: asyncio.Queue[tuple[datetime, float, int]] = (
+            asyncio.Queue()
+        )
+        self._flush_task: asyncio.Task | None = None
+
+        # Notification IDs
+        self._notify_success_id = f"{entry.entry_id}_sync_success"
+        self._notify_error_id = f"{entry.entry_id}_sync_error"
+
+        # Configuration snapshot; the options flow reloads the entry, which
+        # rebuilds the coordinator, so it never goes stale
+        self._status_entity: str | None = entry.options.get(CONF_STATUS_ENTITY)
+        self._distance_entity: str | None = entry.options.get(CONF_DISTANCE_ENTITY)
+        self._auto_sync: bool = entry.data.get(CONF_AUTO_SYNC, DEFAULT_AUTO_SYNC)
+        self._activity_type: str = entry.data.get(
+            CONF_ACTIVITY_TYPE, DEFAULT_ACTIVITY_TYPE
+        )
+        self._notifications_enabled: bool = entry.data.get(
+            CONF_NOTIFICATION_ENABLED, DEFAULT_NOTIFICATION_ENABLED
+        )
 
     async def async_setup(self) -> None:
         """Set up state listeners."""
-        status_entity = self.entry.options.get(CONF_STATUS_ENTITY)
+        status_entity = self._status_entity
 
         if not status_entity:
             _LOGGER.error("No status entity configured")
@@ -62,11 +124,16 @@ class FitbitTreadmillCoordinator:
         self._unsub_listeners.append(
             async_track_state_change_event(
                 self.hass,
-                [status_entity],
+                status_entity,
                 self._async_status_changed,
             )
         )
 
+        # Sync completed workouts in the background
+        self._flush_task = self.entry.async_create_background_task(
+            self.hass, self._batch_flusher(), f"{DOMAIN} batch flusher"
+        )
+
         _LOGGER.info("Coordinator setup complete, monitoring: %s", status_entity)
 
     async def async_unload(self) -> None:
@@ -74,12 +141,17 @@ class FitbitTreadmillCoordinator:
         for unsub in self._unsub_listeners:
             unsub()
         self._unsub_listeners.clear()
+
+        # The flusher syncs pending and queued workouts when cancelled
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
         _LOGGER.info("Coordinator unloaded")
 
     @callback
-    async def _async_status_changed(
-        self, event: Event[EventStateChangedData]
-    ) -> None:
+    def _async_status_changed(self, event: Event[EventStateChangedData]) -> None:
         """Handle treadmill status change."""
         new_state = event.data["new_state"]
         old_state = event.data["old_state"]
@@ -87,32 +159,73 @@ class FitbitTreadmillCoordinator:
         if new_state is None or old_state is None:
             return
 
-        _LOGGER.debug(
-            "Status changed: %s -> %s",
-            old_state.state,
-            new_state.state,
-        )
+        # Ignore attribute-only updates and changes into untracked states
+        if (
+            new_state.state not in _TRACKED_STATES
+            or old_state.state == new_state.state
+        ):
+            return
 
-        # Start tracking when workout begins
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Status changed: %s -> %s",
+                old_state.state,
+                new_state.state,
+            )
+
+        # Start tracking when workout begins. The start edge isn't debounced:
+        # a flicker back to Working cancels the pending completion below, and
+        # a spurious start is simply replaced by the next one.
         if old_state.state != STATE_WORKING and new_state.state == STATE_WORKING:
-            await self._async_start_session(new_state.last_changed)
+            if self._debounce_handle is not None:
+                # Status flickered back before the sync fired; keep the session
+                self._debounce_handle.cancel()
+                self._debounce_handle = None
+                _LOGGER.debug("Workout resumed, continuing current session")
+            else:
+                self.hass.async_create_task(
+                    self._async_start_session(new_state.last_changed)
+                )
 
-        # Sync when workout completes
+        # Sync when workout completes, once the status has settled
         elif old_state.state == STATE_WORKING and new_state.state == STATE_POST_WORKOUT:
             # Check if auto-sync is enabled
-            if self.entry.data.get(CONF_AUTO_SYNC, True):
-                await self._async_complete_session(new_state.last_changed)
+            if self._auto_sync:
+                if self._debounce_handle is not None:
+                    self._debounce_handle.cancel()
+                self._debounce_end_time = new_state.last_changed
+                self._debounce_handle = self.hass.loop.call_later(
+                    SYNC_DEBOUNCE_SECONDS, self._async_debounced_complete
+                )
             else:
                 _LOGGER.info(
                     "Workout completed but auto-sync is disabled. Use manual sync service."
                 )
 
+    @callback
+    def _async_debounced_complete(self) -> None:
+        """Complete the session once the status has stayed Post-Workout."""
+        self._debounce_handle = None
+        self._complete_task = self.hass.async_create_task(
+            self._async_complete_session(self._debounce_end_time)
+        )
+
+    async def _async_complete_pending(self) -> None:
+        """Complete any session still waiting on its debounce."""
+        if self._debounce_handle is not None:
+            self._debounce_handle.cancel()
+            self._debounce_handle = None
+            await self._async_complete_session(self._debounce_end_time)
+        if self._complete_task is not None and not self._complete_task.done():
+            await self._complete_task
+
     async def _async_start_session(self, start_time: datetime) -> None:
         """Start tracking a workout session."""
         try:
             distance = await self._get_distance_value()
             self._current_session = {
                 "start_time": start_time,
+                "start_ts": start_time.timestamp(),
                 "start_distance": distance,
             }
             _LOGGER.info(
@@ -120,22 +233,28 @@ class FitbitTreadmillCoordinator:
                 start_time,
                 distance,
             )
-        except Exception as err:
+        except ValueError as err:
             _LOGGER.warning("Failed to start session tracking: %s", err)
             self._current_session = {
                 "start_time": start_time,
+                "start_ts": start_time.timestamp(),
                 "start_distance": 0.0,
             }
 
     async def _async_complete_session(self, end_time: datetime) -> None:
         """Complete workout session and sync to Fitbit."""
+        end_ts = end_time.timestamp()
+
         if self._current_session is None:
             _LOGGER.warning("No active session found, syncing current distance")
             start_time = end_time
+            start_ts = end_ts
             start_distance = 0.0
         else:
             start_time = self._current_session["start_time"]
+            start_ts = self._current_session["start_ts"]
             start_distance = self._current_session["start_distance"]
+            self._current_session = None
 
         try:
             # Get final distance
@@ -148,11 +267,11 @@ class FitbitTreadmillCoordinator:
                     "Workout distance too small (%.3f mi), skipping sync",
                     workout_distance,
                 )
-                await self._notify_sync_result(
-                    success=False,
-                    error=f"Distance too small: {workout_distance:.3f} miles",
-                )
-                self._current_session = None
+                if self._should_notify():
+                    await self._notify_sync_result(
+                        success=False,
+                        error=f"Distance too small: {workout_distance:.3f} miles",
+                    )
                 return
 
             if workout_distance > MAX_DISTANCE:
@@ -160,16 +279,15 @@ class FitbitTreadmillCoordinator:
                     "Workout distance unreasonably large (%.2f mi), skipping sync",
                     workout_distance,
                 )
-                await self._notify_sync_result(
-                    success=False,
-                    error=f"Distance too large: {workout_distance:.2f} miles",
-                )
-                self._current_session = None
+                if self._should_notify():
+                    await self._notify_sync_result(
+                        success=False,
+                        error=f"Distance too large: {workout_distance:.2f} miles",
+                    )
                 return
 
             # Calculate duration
-            duration = end_time - start_time
-            duration_minutes = max(1, int(duration.total_seconds() / 60))
+            duration_minutes = max(1, int((end_ts - start_ts) / 60))
 
             _LOGGER.info(
                 "Workout completed: %.2f miles in %d minutes",
@@ -177,37 +295,102 @@ class FitbitTreadmillCoordinator:
                 duration_minutes,
             )
 
-            # Sync to Fitbit
-            await self._async_sync_workout(
-                distance=workout_distance,
-                start_time=start_time,
-                duration_minutes=duration_minutes,
+            # Queue for sync to Fitbit
+            self._pending_queue.put_nowait(
+                (start_time, workout_distance, duration_minutes)
             )
 
-        except Exception as err:
+        except ValueError as err:
             _LOGGER.error("Failed to complete session: %s", err)
-            await self._notify_sync_result(success=False, error=str(err))
+            if self._should_notify():
+                await self._notify_sync_result(success=False, error=str(err))
 
-        finally:
-            self._current_session = None
+    async def _batch_flusher(self) -> None:
+        """Sync queued workouts, combining those completed close together.
+
+        On cancellation (unload or shutdown) any pending session, queued
+        workouts and a batch in progress are synced before the task exits.
+        """
+        batch: list[tuple[datetime, float, int]] = []
+        sync_task: asyncio.Task | None = None
+        try:
+            while True:
+                batch.append(await self._pending_queue.get())
+
+                # Keep collecting until no workout arrives within the window
+                while True:
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(
+                                self._pending_queue.get(), timeout=SYNC_BATCH_WINDOW
+                            )
+                        )
+                    except asyncio.TimeoutError:
+                        break
+
+                # Shield the sync so a cancel can't drop an activity that
+                # Fitbit has already created
+                sync_task = self.hass.async_create_task(self._async_sync_batch(batch))
+                batch = []
+                await asyncio.shield(sync_task)
+                sync_task = None
+
+        except asyncio.CancelledError:
+            if sync_task is not None:
+                await sync_task
+            await self._async_complete_pending()
+            while not self._pending_queue.empty():
+                batch.append(self._pending_queue.get_nowait())
+            if batch:
+                _LOGGER.info("Syncing %d pending workout(s) before unload", len(batch))
+                await self._async_sync_batch(batch)
+            raise
+
+    async def _async_sync_batch(self, batch: list[tuple[datetime, float, int]]) -> None:
+        """Sync a batch of completed workouts as one Fitbit activity."""
+        distance = sum(item[1] for item in batch)
+
+        if distance > MAX_DISTANCE:
+            _LOGGER.error(
+                "Combined workout distance unreasonably large (%.2f mi), skipping sync",
+                distance,
+            )
+            if self._should_notify():
+                await self._notify_sync_result(
+                    success=False,
+                    error=f"Distance too large: {distance:.2f} miles",
+                )
+            return
+
+        if len(batch) > 1:
+            _LOGGER.info("Combining %d workouts into one activity", len(batch))
+
+        try:
+            await self._async_sync_workout(
+                distance=distance,
+                start_time=min(item[0] for item in batch),
+                duration_minutes=sum(item[2] for item in batch),
+            )
+        except (ConfigEntryAuthFailed, FitbitAPIError) as err:
+            # Already logged and notified by _async_sync_workout
+            _LOGGER.debug("Queued workout sync failed: %s", err)
+        except Exception:
+            # Keep the flusher alive for later workouts
+            _LOGGER.exception("Unexpected error syncing queued workouts")
 
     async def _async_sync_workout(
         self,
         distance: float,
         start_time: datetime,
         duration_minutes: int,
-    ) -> dict[str, Any]:
+    ) -> SyncRecord:
         """Sync workout to Fitbit."""
         try:
-            # Get configuration
-            activity_type = self.entry.data.get(CONF_ACTIVITY_TYPE, "Walking")
-            stride_length = self.entry.data.get(CONF_STRIDE_LENGTH, 2.5)
+            activity_type = self._activity_type
 
             # Convert distance to steps
-            steps, conversion_method = await self.api.convert_distance_to_steps(
+            steps, conversion_method = self.api.convert_distance_to_steps(
                 distance_miles=distance,
-                stride_feet=stride_length,
-                activity_type=activity_type,
             )
 
             _LOGGER.info(
@@ -220,7 +403,6 @@ class FitbitTreadmillCoordinator:
 
             # Create activity log in Fitbit
             response = await self.api.create_activity_log(
-                activity_type=activity_type,
                 distance_miles=distance,
                 start_time=start_time,
                 duration_minutes=duration_minutes,
@@ -228,31 +410,30 @@ class FitbitTreadmillCoordinator:
             )
 
             # Record in history
-            sync_record = {
-                "timestamp": datetime.now(),
-                "distance_miles": distance,
-                "steps": steps,
-                "duration_minutes": duration_minutes,
-                "conversion_method": conversion_method,
-                "activity_type": activity_type,
-                "success": True,
-                "fitbit_log_id": response.get("activityLog", {}).get("logId"),
-            }
+            now = datetime.now()
+            sync_record = SyncRecord(
+                timestamp=now,
+                distance_miles=distance,
+                steps=steps,
+                duration_minutes=duration_minutes,
+                conversion_method=conversion_method,
+                activity_type=activity_type,
+                success=True,
+                fitbit_log_id=response.get("activityLog", _EMPTY).get("logId"),
+            )
 
+            # History is bounded; the oldest record is dropped when full
             self._sync_history.append(sync_record)
 
-            # Keep history size manageable
-            if len(self._sync_history) > MAX_HISTORY_SIZE:
-                self._sync_history.pop(0)
-
-            self._last_sync_time = datetime.now()
+            self._last_sync_time = now
 
             # Notify user
-            await self._notify_sync_result(
-                success=True,
-                steps=steps,
-                distance=distance,
-            )
+            if self._should_notify():
+                await self._notify_sync_result(
+                    success=True,
+                    steps=steps,
+                    distance=distance,
+                )
 
             # Fire event for automations
             self.hass.bus.async_fire(
@@ -272,42 +453,37 @@ class FitbitTreadmillCoordinator:
 
         except ConfigEntryAuthFailed as err:
             _LOGGER.error("Authentication failed, reauth required: %s", err)
-            await self._notify_sync_result(
-                success=False,
-                error="Authentication failed - please reconfigure integration",
-            )
+            if self._should_notify():
+                await self._notify_sync_result(
+                    success=False,
+                    error="Authentication failed - please reconfigure integration",
+                )
             # Trigger reauth
             self.entry.async_start_reauth(self.hass)
             raise
 
         except RateLimitError as err:
             _LOGGER.warning("Rate limit exceeded: %s", err)
-            await self._notify_sync_result(
-                success=False,
-                error="Fitbit rate limit exceeded - will retry later",
-            )
+            if self._should_notify():
+                await self._notify_sync_result(
+                    success=False,
+                    error="Fitbit rate limit exceeded - will retry later",
+                )
             # Could implement retry queue here
             raise
 
         except FitbitAPIError as err:
             _LOGGER.error("Fitbit API error: %s", err)
-            await self._notify_sync_result(
-                success=False,
-                error=f"Fitbit API error: {err}",
-            )
-            raise
-
-        except Exception as err:
-            _LOGGER.error("Unexpected error during sync: %s", err)
-            await self._notify_sync_result(
-                success=False,
-                error=f"Unexpected error: {err}",
-            )
+            if self._should_notify():
+                await self._notify_sync_result(
+                    success=False,
+                    error=f"Fitbit API error: {err}",
+                )
             raise
 
     async def _get_distance_value(self) -> float:
         """Get current distance from sensor."""
-        distance_entity = self.entry.options.get(CONF_DISTANCE_ENTITY)
+        distance_entity = self._distance_entity
 
         if not distance_entity:
             raise ValueError("Distance entity not configured")
@@ -327,6 +503,10 @@ class FitbitTreadmillCoordinator:
 
         return distance
 
+    def _should_notify(self) -> bool:
+        """Return whether sync notifications are enabled."""
+        return self._notifications_enabled
+
     async def _notify_sync_result(
         self,
         success: bool,
@@ -334,32 +514,32 @@ class FitbitTreadmillCoordinator:
         distance: float | None = None,
         error: str | None = None,
     ) -> None:
-        """Send persistent notification to user."""
-        if not self.entry.data.get(CONF_NOTIFICATION_ENABLED, True):
+        """Send persistent notification to user.
+
+        Callers check _should_notify() first so that nothing is awaited
+        when notifications are disabled; the check here is a safeguard.
+        """
+        if not self._should_notify():
             return
 
         if success:
-            message = (
-                f"Treadmill workout synced to Fitbit!\n\n"
-                f"Distance: {distance:.2f} miles\n"
-                f"Steps: {steps:,}"
-            )
-            notification_id = f"{self.entry.entry_id}_sync_success"
+            message = _SUCCESS_MESSAGE(distance, steps)
+            notification_id = self._notify_success_id
         else:
-            message = f"Failed to sync workout to Fitbit:\n{error}"
-            notification_id = f"{self.entry.entry_id}_sync_error"
+            message = _ERROR_MESSAGE(error)
+            notification_id = self._notify_error_id
 
         await self.hass.services.async_call(
             "persistent_notification",
             "create",
             {
-                "title": "Fitbit Treadmill Sync",
+                "title": _NOTIFICATION_TITLE,
                 "message": message,
                 "notification_id": notification_id,
             },
         )
 
-    async def manual_sync(self, distance_override: float | None = None) -> dict[str, Any]:
+    async def manual_sync(self, distance_override: float | None = None) -> SyncRecord:
         """Manually trigger workout sync."""
         _LOGGER.info("Manual sync triggered")
 
@@ -373,7 +553,7 @@ class FitbitTreadmillCoordinator:
                 _LOGGER.info("Using sensor distance: %.2f miles", distance)
 
             # Use current time
-            start_time = datetime.now(self.hass.config.time_zone)
+            start_time = dt_util.now()
 
             # Estimate duration based on distance (assume 20 min/mile average)
             duration_minutes = max(1, int(distance * 20))
@@ -385,15 +565,16 @@ class FitbitTreadmillCoordinator:
                 duration_minutes=duration_minutes,
             )
 
-        except Exception as err:
+        except ValueError as err:
             _LOGGER.error("Manual sync failed: %s", err)
-            await self._notify_sync_result(success=False, error=str(err))
+            if self._should_notify():
+                await self._notify_sync_result(success=False, error=str(err))
             raise
 
     @property
-    def sync_history(self) -> list[dict[str, Any]]:
+    def sync_history(self) -> list[SyncRecord]:
         """Get sync history."""
-        return self._sync_history
+        return list(self._sync_history)
 
     @property
     def last_sync_time(self) -> datetime | None: